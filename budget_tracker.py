@@ -3,54 +3,338 @@ and create and monitor budgets and saving goals.'''
 
 # -------------- LIBRARIES/MODULES --------------
 
+import atexit
+import functools
 import sqlite3
+import sys
 from tabulate import tabulate
 
 
+# -------------- CONSTANTS --------------
+
+# Rule of dashes used in borders and listing headers.
+DASHES = "-"*10
+
+# Border written to separate outputs.
+_BORDER = "\n" + DASHES + "\n\n"
+
+# Error messages for invalid menu selections, including the border.
+_INVALID_INT = ("\nInvalid input. Please enter selection as an integer.\n" 
+                + _BORDER)
+_INVALID_SELECTION = "\nInvalid selection - please try again.\n" + _BORDER
+
+# Error message for a menu action that could not reach the database, 
+# e.g. because another instance of the program is writing to it.
+_DB_BUSY = ("\nThe database is busy - no changes were saved. "
+            "Please try again.\n" + _BORDER)
+
+# Expense and income listings are formatted with a single f-string per 
+# row, avoiding tabulate's per-cell width detection. Set to True to 
+# format them with tabulate instead.
+_USE_TABULATE = False
+
+# Header of the (ID, Category, Amount) listings.
+_RECORD_HEADER = (f"{'ID':>4}  {'Category':<20}  {'Amount':>10}\n"
+                  f"{'-'*4}  {'-'*20}  {DASHES}")
+
+# Header of the per-category amount listings.
+_AMOUNT_HEADER = f"{'Amount':>10}\n{DASHES}"
+
+# Menu prompts, built once rather than on every pass of the menu loops.
+_MAIN_PROMPT = '''\nWould you like to:
+    1. Manage expenses
+    2. Manage income
+    3. Manage budgets
+    4. Manage financial goals
+    0. Exit
+                            
+Enter selection: '''
+
+_EXPENSE_PROMPT = '''\nWould you like to:
+    1. Add an expense category
+    2. Delete expense category
+    3. Add new expense
+    4. View all expenses
+    5. View all expense categories
+    6. View expenses by category
+    7. Update expense
+    8. Delete expense
+    0. Return to main menu
+    
+Enter selection: '''
+
+_INCOME_PROMPT = '''\nWould you like to:
+    1. Add an income category
+    2. Delete an income category
+    3. Add new income
+    4. View all income
+    5. View income categories
+    6. View income by category
+    7. Update income
+    8. Delete income
+    0. Return to main menu
+    
+Enter selection: '''
+
+_BUDGET_PROMPT = '''\nWould you like to:
+    1. Display current budget
+    2. Set a category budget
+    3. View current category budgets
+    4. View a category budget
+    5. Update a category budget
+    6. Delete a category budget
+    0. Return to main menu
+    
+Enter selection: '''
+
+_GOAL_PROMPT = '''\nWould you like to:
+    1. Set a financial goal
+    2. View current goals
+    3. View progress towards financial goals
+    4. Update a financial goal
+    5. Delete goal
+    0. Return to main menu
+    
+Enter selection: '''
+
+
+# -------------- DATABASE CONNECTION --------------
+
+# A single connection is opened at startup and shared by all database
+# functions, rather than reconnecting for every menu action.
+_DB = sqlite3.connect('finance_manager.db', check_same_thread=False, 
+                      isolation_level=None, cached_statements=256)
+# Rows support access by column name as well as by position.
+_DB.row_factory = sqlite3.Row
+atexit.register(_DB.close)
+
+# These settings only last for the life of a connection, so they are 
+# applied as soon as it is opened. NORMAL sync halves the fsyncs of 
+# each commit under WAL, and foreign keys must be on for deletes to 
+# cascade.
+_DB.executescript('''
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -65536;
+    PRAGMA foreign_keys = ON;
+''')
+
+# Cached result of fetch_budget_status(), cleared when budgets or 
+# expenses are modified.
+_BUDGET_STATUS = {}
+
+# Sets of the record IDs in each table, shared by every menu for 
+# validating ID selections. Sets are kept up to date as records are 
+# inserted and deleted, rather than re-read from the database.
+_ID_CACHE = {}
+
+# Value of PRAGMA data_version when the caches were last checked. It 
+# changes whenever another connection commits to the database.
+_data_version = None
+
+# Tables whose records are deleted along with a record of the key table.
+_CASCADES = {
+    'expense_category': ('expenses', 'budgets'),
+    'income_category': ('income',),
+}
+
+# Every statement the generic helper functions may run, keyed by 
+# operation, table, and (where needed) column. Table and column names 
+# are never taken from elsewhere, and each statement is always the same 
+# string, so repeated calls hit SQLite's prepared statement cache.
+_SQL = {
+    ('ins', 'expense_category'): 
+        "INSERT INTO expense_category VALUES (NULL, ?)",
+    ('del', 'expense_category'): "DELETE FROM expense_category WHERE id = ?",
+    ('sel', 'expense_category'): "SELECT * FROM expense_category",
+    ('sel', 'expense_category', ('id',)): "SELECT id FROM expense_category",
+    ('exists', 'expense_category', 'name'): 
+        "SELECT EXISTS(SELECT 1 FROM expense_category WHERE name = ? "
+        "LIMIT 1) AS found",
+
+    ('ins', 'income_category'): "INSERT INTO income_category VALUES (NULL, ?)",
+    ('del', 'income_category'): "DELETE FROM income_category WHERE id = ?",
+    ('sel', 'income_category'): "SELECT * FROM income_category",
+    ('sel', 'income_category', ('id',)): "SELECT id FROM income_category",
+    ('exists', 'income_category', 'name'): 
+        "SELECT EXISTS(SELECT 1 FROM income_category WHERE name = ? "
+        "LIMIT 1) AS found",
+
+    ('ins', 'expenses'): "INSERT INTO expenses VALUES (NULL, ?, ?)",
+    ('del', 'expenses'): "DELETE FROM expenses WHERE id = ?",
+    ('sel', 'expenses', ('id',)): "SELECT id FROM expenses",
+    ('upd', 'expenses', 'category_id'): 
+        "UPDATE expenses SET category_id = ? WHERE id = ?",
+    ('upd', 'expenses', 'amount'): 
+        "UPDATE expenses SET amount = ? WHERE id = ?",
+    ('by_category', 'expenses'): 
+        "SELECT amount FROM expenses WHERE category_id = ?",
+
+    ('ins', 'income'): "INSERT INTO income VALUES (NULL, ?, ?)",
+    ('del', 'income'): "DELETE FROM income WHERE id = ?",
+    ('sel', 'income', ('id',)): "SELECT id FROM income",
+    ('upd', 'income', 'category_id'): 
+        "UPDATE income SET category_id = ? WHERE id = ?",
+    ('upd', 'income', 'amount'): "UPDATE income SET amount = ? WHERE id = ?",
+    ('by_category', 'income'): 
+        "SELECT amount FROM income WHERE category_id = ?",
+
+    ('ins', 'budgets'): "INSERT INTO budgets VALUES (NULL, ?, ?)",
+    ('del', 'budgets'): "DELETE FROM budgets WHERE id = ?",
+    ('sel', 'budgets', ('id',)): "SELECT id FROM budgets",
+    ('upd', 'budgets', 'amount'): "UPDATE budgets SET amount = ? WHERE id = ?",
+    ('ins_new', 'budgets'): 
+        "INSERT INTO budgets (category_id, amount) VALUES (?, ?) "
+        "ON CONFLICT(category_id) DO NOTHING",
+
+    ('ins', 'financial_goals'): 
+        "INSERT INTO financial_goals VALUES (NULL, ?, ?, ?)",
+    ('del', 'financial_goals'): "DELETE FROM financial_goals WHERE id = ?",
+    ('sel', 'financial_goals', ('id',)): "SELECT id FROM financial_goals",
+    ('sel', 'financial_goals', ('id', 'description')): 
+        "SELECT id, description FROM financial_goals",
+    ('upd', 'financial_goals', 'description'): 
+        "UPDATE financial_goals SET description = ? WHERE id = ?",
+    ('upd', 'financial_goals', 'target'): 
+        "UPDATE financial_goals SET target = ? WHERE id = ?",
+    ('upd', 'financial_goals', 'progress'): 
+        "UPDATE financial_goals SET progress = ? WHERE id = ?",
+    ('exists', 'financial_goals', 'description'): 
+        "SELECT EXISTS(SELECT 1 FROM financial_goals WHERE description = ? "
+        "LIMIT 1) AS found",
+}
+
+
 # -------------- DATABASE FUNCTIONS --------------
 
 
-def create_database():
+def create_database(conn=_DB):
     """
-    Creates database and tables for expenses, income, budget, and 
-    saving goals if they do not already exist.
+    Switches the database to WAL journaling and creates database tables 
+    and indexes for expenses, income, budget, and saving goals if they 
+    do not already exist. All statements are sent to SQLite as one 
+    script.
     """
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-    
-        cursor.execute('''CREATE TABLE IF NOT EXISTS expense_category 
-                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS expenses 
-                    (id INTEGER PRIMARY KEY AUTOINCREMENT, category_id INTEGER, 
-                    amount REAL, FOREIGN KEY (category_id) 
-                    REFERENCES expense_category(id) ON DELETE CASCADE)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS income_category 
-                    (id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                    name TEXT NOT NULL UNIQUE)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS income 
-                    (id INTEGER PRIMARY KEY AUTOINCREMENT, category_id INTEGER, 
-                    amount REAL, FOREIGN KEY (category_id) 
-                    REFERENCES income_category(id) ON DELETE CASCADE)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS budgets 
-                    (id INTEGER PRIMARY KEY AUTOINCREMENT, category_id INTEGER, 
-                    amount REAL, FOREIGN KEY (category_id) 
-                    REFERENCES expense_category(id) ON DELETE CASCADE)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS financial_goals 
-                    (id INTEGER PRIMARY KEY AUTOINCREMENT, description TEXT, 
-                    target REAL, progress REAL)''')
-        
-        db.commit()
+    conn.executescript('''
+        -- WAL journaling is stored in the database file, so it persists 
+        -- across connections. It avoids rewriting the database file on 
+        -- every commit.
+        PRAGMA journal_mode = WAL;
+
+        CREATE TABLE IF NOT EXISTS expense_category 
+            (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE);
+
+        CREATE TABLE IF NOT EXISTS expenses 
+            (id INTEGER PRIMARY KEY AUTOINCREMENT, category_id INTEGER, 
+            amount REAL, FOREIGN KEY (category_id) 
+            REFERENCES expense_category(id) ON DELETE CASCADE);
+
+        CREATE TABLE IF NOT EXISTS income_category 
+            (id INTEGER PRIMARY KEY AUTOINCREMENT, 
+            name TEXT NOT NULL UNIQUE);
+
+        CREATE TABLE IF NOT EXISTS income 
+            (id INTEGER PRIMARY KEY AUTOINCREMENT, category_id INTEGER, 
+            amount REAL, FOREIGN KEY (category_id) 
+            REFERENCES income_category(id) ON DELETE CASCADE);
+
+        CREATE TABLE IF NOT EXISTS budgets 
+            (id INTEGER PRIMARY KEY AUTOINCREMENT, category_id INTEGER, 
+            amount REAL, FOREIGN KEY (category_id) 
+            REFERENCES expense_category(id) ON DELETE CASCADE);
+
+        CREATE TABLE IF NOT EXISTS financial_goals 
+            (id INTEGER PRIMARY KEY AUTOINCREMENT, description TEXT, 
+            target REAL, progress REAL);
+
+        -- Indexes for the columns used in category filters, joins, and 
+        -- goal lookups, so these queries avoid full table scans.
+        CREATE INDEX IF NOT EXISTS idx_expenses_cat ON expenses(category_id);
+        CREATE INDEX IF NOT EXISTS idx_income_cat ON income(category_id);
+        CREATE INDEX IF NOT EXISTS idx_goal_desc 
+            ON financial_goals(description);
+
+        -- Each category may only have one budget.
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_budgets_cat 
+            ON budgets(category_id);
+    ''')
 
 
 # -------------- HELPER FUNCTIONS --------------
 
 
+def _write(text):
+    """
+    Writes a prebuilt string straight to stdout, bypassing print()'s 
+    separator handling. sys.stdout is looked up on every call, so 
+    redirected output is captured.
+    """
+    sys.stdout.write(text)
+
+
+def get_statement(operation, table, fields=None):
+    """
+    Returns the SQL for an operation on a table (and column, if given).
+    Raises ValueError for combinations that are not supported.
+    """
+    key = (operation, table) if fields is None else (operation, table, fields)
+    if key not in _SQL:
+        raise ValueError(f"Unsupported SQL operation: {key}.")
+    return _SQL[key]
+
+
+def begin_write():
+    """
+    Opens the transaction for the current menu action before a write, 
+    if one is not already open.
+    """
+    if not _DB.in_transaction:
+        _DB.execute('BEGIN IMMEDIATE')
+
+
+def flush():
+    """
+    Commits all writes made since the last commit.
+    """
+    if _DB.in_transaction:
+        _DB.commit()
+
+
+def rollback():
+    """
+    Discards all writes made since the last commit, along with any 
+    cached results that may include them.
+    """
+    if _DB.in_transaction:
+        _DB.rollback()
+    clear_caches()
+
+
+def clear_caches():
+    """
+    Discards all cached query results and record IDs.
+    """
+    _ID_CACHE.clear()
+    _BUDGET_STATUS.clear()
+    _fetch_all.cache_clear()
+
+
+def refresh_caches():
+    """
+    Discards all cached results if another connection has changed the 
+    database since the last check.
+    """
+    global _data_version
+    cursor = _DB.cursor()
+    cursor.execute('PRAGMA data_version')
+    data_version = cursor.fetchone()[0]
+    if data_version != _data_version:
+        _data_version = data_version
+        clear_caches()
+
+
 def add_category(table, name, unique_message):
     """
     Adds a category to the specified table if it does not already exist.
@@ -58,36 +342,83 @@ def add_category(table, name, unique_message):
     """
     name = name.title()
     
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        # Check if the category already exists to prevent duplicates
-        cursor.execute(f'''SELECT 1 FROM {table} WHERE name = ?''', (name,))
-        if cursor.fetchone():
-            print(unique_message)
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-        else:
-            # Insert the new category
-            cursor.execute(f'''INSERT INTO {table} (name) 
-                           VALUES (?)''', (name,))
-            db.commit()
-            print(f"\nCategory '{name}' added successfully to '{table}'.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
+    # Check if the category already exists to prevent duplicates
+    if column_exists(table, 'name', name):
+        print(unique_message)
+        _write(_BORDER)
+    else:
+        # Insert the new category
+        begin_write()
+        cursor = _DB.cursor()
+        cursor.execute(get_statement('ins', table), (name,))
+        add_cached_id(table, cursor.lastrowid)
+        invalidate_cache(table)
+        print(f"\nCategory '{name}' added successfully to '{table}'.")
+        _write(_BORDER)
+
+
+def add_records(table, rows):
+    """
+    Adds multiple records to specified table in a single transaction, 
+    which is committed before returning unless a transaction was 
+    already open.
+    """
+    if not rows:
+        return
+    
+    cursor = _DB.cursor()
+    if _DB.in_transaction:
+        # The savepoint undoes the whole batch if any insert fails, 
+        # without losing other writes in the open transaction.
+        cursor.execute('SAVEPOINT add_records')
+        try:
+            _insert_rows(cursor, table, rows)
+        except sqlite3.Error:
+            cursor.execute('ROLLBACK TO add_records')
+            raise
+        finally:
+            cursor.execute('RELEASE add_records')
+    else:
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            _insert_rows(cursor, table, rows)
+            _DB.commit()
+        except sqlite3.Error:
+            rollback()
+            raise
+    invalidate_cache(table)
+
+
+def _insert_rows(cursor, table, rows):
+    """
+    Inserts rows into the specified table for add_records() and updates 
+    the table's cached IDs.
+    """
+    sql = get_statement('ins', table)
+    # A single insert reports its new ID, so the cached IDs are updated 
+    # in place. executemany does not report each new ID, so the IDs are 
+    # re-read after a batch.
+    if len(rows) == 1:
+        cursor.execute(sql, rows[0])
+        add_cached_id(table, cursor.lastrowid)
+    else:
+        cursor.executemany(sql, rows)
+        _ID_CACHE.pop(table, None)
 
 
 def add_record(table, values):
     """
     Adds a record to specified table in the database.
     """
-    number_of_values = len(values)
-    placeholders = ', '.join(['?'] * number_of_values)
-    
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute(f'''INSERT INTO {table} 
-                       VALUES (NULL, {placeholders})''', values)
-        db.commit()
-        print(f"\nRecord added to {table}.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+    try:
+        add_records(table, [values])
+    except sqlite3.IntegrityError:
+        # E.g. the category was deleted by another instance of the program.
+        print(f"\nRecord not added to {table} - invalid values: {values}.")
+        _write(_BORDER)
+        return
+    print(f"\nRecord added to {table}.")
+    _write(_BORDER)
 
 
 def update_record(table, record_id, fields):
@@ -121,65 +452,171 @@ def perform_update(table, field, new_value, record_id):
     Executes the update operation on the database, 
     changing the specified field of a record.
     """
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute(f'''UPDATE {table} SET {field} = ? 
-                       WHERE id = ?''', (new_value, record_id))
-        db.commit()
-        print(f"\n{field.capitalize()} updated successfully.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+    sql = get_statement('upd', table, field)
+    
+    begin_write()
+    cursor = _DB.cursor()
+    try:
+        cursor.execute(sql, (new_value, record_id))
+    except sqlite3.IntegrityError:
+        # Foreign keys are enforced, so e.g. an unknown category is refused.
+        print(f"\nUpdate failed - invalid {field}: {new_value}.")
+        _write(_BORDER)
+        return
+    invalidate_cache(table)
+    print(f"\n{field.capitalize()} updated successfully.")
+    _write(_BORDER)
 
 def delete_record(table, record_id):
     """
     Deletes a record from specified table in the database.
     """
-    with sqlite3.connect('finance_manager.db') as db:
-        db.execute('PRAGMA foreign_keys = ON;')
-        db.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
-        db.commit()
-        print(f"Record deleted from {table}.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+    begin_write()
+    _DB.execute(get_statement('del', table), (record_id,))
+    remove_cached_id(table, record_id)
+    invalidate_cache(table)
+    print(f"Record deleted from {table}.")
+    _write(_BORDER)
 
 
 def fetch_all(table, columns=None):
     """
     Retrieves all records from a specified table in the database.
-    If columns are specified, retrieves only those columns.
+    If columns are specified, retrieves only those columns. Results are
+    cached until the next change to the database.
     """
-    columns_formatted = '*' if columns is None else ', '.join(columns)
-    
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute(f"SELECT {columns_formatted} FROM {table}")
-        records = cursor.fetchall()
-        return records    
+    if columns is not None:
+        columns = tuple(columns)
+    return _fetch_all(table, columns)
+
+
+@functools.lru_cache(maxsize=None)
+def _fetch_all(table, columns):
+    """
+    Runs the query for fetch_all(), keyed on the table and a tuple of 
+    columns so the result can be cached.
+    """
+    cursor = _DB.cursor()
+    cursor.execute(get_statement('sel', table, columns))
+    return tuple(cursor.fetchall())
 
 
 def fetch_expenses():
     """
-    Retrieves all expense records including associated category name.
+    Retrieves all expense records including associated category name,
+    along with the total of the listed expenses.
     """
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute('''SELECT expenses.id, expense_category.name, 
-                       expenses.amount FROM expenses expenses 
-                       JOIN expense_category expense_category 
-                       ON expenses.category_id = expense_category.id''')
-        expenses = cursor.fetchall()
-        return expenses
+    cursor = _DB.cursor()
+    # The total is a window over the joined rows, so it only includes 
+    # the expenses that are listed.
+    cursor.execute('''SELECT expenses.id, expense_category.name, 
+                   expenses.amount, TOTAL(expenses.amount) OVER () AS total
+                   FROM expenses expenses 
+                   JOIN expense_category expense_category 
+                   ON expenses.category_id = expense_category.id''')
+    expenses = cursor.fetchall()
+    total_expenses = expenses[0]['total'] if expenses else 0.0
+    return expenses, total_expenses
 
 
 def fetch_income():
     """
-    Retrieves all income records including associated category name.
+    Retrieves all income records including associated category name,
+    along with the total of the listed income.
+    """
+    cursor = _DB.cursor()
+    # The total is a window over the joined rows, as in fetch_expenses().
+    cursor.execute('''SELECT income.id, income_category.name, income.amount,
+                TOTAL(income.amount) OVER () AS total
+                FROM income income JOIN income_category income_category 
+                ON income.category_id = income_category.id''')
+    incomes = cursor.fetchall()
+    total_income = incomes[0]['total'] if incomes else 0.0
+    return incomes, total_income
+
+
+def print_by_category(table, category_id):
+    """
+    Displays the amounts in 'expenses' or 'income' for a category and 
+    returns their total. Rows are read from the cursor one at a time, 
+    so the result set is never held in memory as a whole.
+    """
+    cursor = _DB.cursor()
+    cursor.execute(get_statement('by_category', table), (category_id,))
+    
+    if _USE_TABULATE:
+        amounts = cursor.fetchall()
+        print(tabulate(amounts, headers=["Amount"], floatfmt=".2f"))
+        return sum(row['amount'] for row in amounts)
+    
+    total = 0.0
+    print(_AMOUNT_HEADER)
+    for (amount,) in cursor:
+        print(f"{amount:>10.2f}")
+        total += amount
+    return total
+
+
+def fetch_budget_status():
+    """
+    Retrieves every category budget with its category name and the total
+    spent in that category, using a single query. The result is cached 
+    until budgets or expenses are next modified.
+    """
+    if 'rows' not in _BUDGET_STATUS:
+        cursor = _DB.cursor()
+        cursor.execute('''SELECT budgets.id, expense_category.name AS category,
+                       budgets.amount, TOTAL(expenses.amount) AS spent 
+                       FROM budgets JOIN expense_category 
+                       ON expense_category.id = budgets.category_id
+                       LEFT JOIN expenses 
+                       ON expenses.category_id = budgets.category_id
+                       GROUP BY budgets.id''')
+        _BUDGET_STATUS['rows'] = cursor.fetchall()
+    return _BUDGET_STATUS['rows']
+
+
+def invalidate_cache(table):
+    """
+    Discards cached query results that depend on the specified table.
+    """
+    # Deletes cascade to other tables, so all cached table reads are 
+    # discarded rather than only those for the specified table.
+    _fetch_all.cache_clear()
+    if table in ('budgets', 'expenses', 'expense_category'):
+        _BUDGET_STATUS.clear()
+
+
+def get_ids(table):
+    """
+    Returns the set of record IDs in the specified table, reading them 
+    from the database only if they are not already cached. The set is 
+    shared, so callers must not modify it.
     """
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute('''SELECT income.id, income_category.name, income.amount 
-                    FROM income income JOIN income_category income_category 
-                    ON income.category_id = income_category.id''')
-        incomes = cursor.fetchall()
-        return incomes
+    if table not in _ID_CACHE:
+        cursor = _DB.cursor()
+        cursor.execute(get_statement('sel', table, ('id',)))
+        _ID_CACHE[table] = {row['id'] for row in cursor}
+    return _ID_CACHE[table]
+
+
+def add_cached_id(table, record_id):
+    """
+    Adds the ID of a newly inserted record to the table's cached IDs.
+    """
+    if table in _ID_CACHE:
+        _ID_CACHE[table].add(record_id)
+
+
+def remove_cached_id(table, record_id):
+    """
+    Removes the ID of a deleted record from the table's cached IDs, and
+    discards the cached IDs of any tables the delete cascades to.
+    """
+    if table in _ID_CACHE:
+        _ID_CACHE[table].discard(record_id)
+    for dependent_table in _CASCADES.get(table, ()):
+        _ID_CACHE.pop(dependent_table, None)
 
 
 def validate_int_input(prompt):
@@ -194,18 +631,6 @@ def validate_int_input(prompt):
             print("\nInvalid input. Please enter a valid integer.\n")
 
 
-def validate_range(value, valid_range):
-    """
-    Ensures that an input integer is within valid range.
-    """
-    if value in valid_range:
-        return value
-    else:
-        print(f'''
-Invalid input. Please select from the list: {valid_range}.\n''')
-        return None
-
-
 def validate_float_input(prompt):
     """
     Ensures user inputs a float value when entering currency amounts.
@@ -218,15 +643,55 @@ def validate_float_input(prompt):
             print("Invalid input. Please enter amount in numerals.")
 
 
+def format_records(records):
+    """
+    Formats (ID, category, amount) records as a table for display.
+    Any further columns in the records are not shown.
+    """
+    if _USE_TABULATE:
+        return tabulate([record[:3] for record in records], 
+                        headers=["ID", "Category", "Amount"], floatfmt=".2f")
+    
+    lines = [_RECORD_HEADER]
+    lines.extend(f"{record_id:>4}  {category:<20}  {amount:>10.2f}" 
+                 for record_id, category, amount, *_ in records)
+    return "\n".join(lines)
+
+
+def prompt_id_in(valid_ids, prompt, max_attempts=3):
+    """
+    Prompts the user for an ID until one in valid_ids is entered, and 
+    returns it. Returns None after too many invalid attempts.
+    """
+    attempts = 0 # Counter for invalid attempts
+    
+    while attempts < max_attempts:
+        try:
+            value = int(input(prompt))
+        except ValueError:
+            print("\nInvalid input. Please enter a valid integer.\n")
+        else:
+            if value in valid_ids:
+                return value
+            print(f'''
+Invalid input. Please select from the list: {sorted(valid_ids)}.\n''')
+        attempts += 1
+    
+    print("Too many invalid attempts. Please try again later.")
+    _write(_BORDER)
+    return None
+
+
 def column_exists(table, column, value):
     """
     Returns True if the given value exists in the specified column 
-    of the table, else False.
+    of the table, else False. SQLite stops searching at the first match.
     """
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute(f"SELECT 1 FROM {table} WHERE {column} = ?", (value,))
-        return cursor.fetchone() is not None
+    sql = get_statement('exists', table, column)
+    
+    cursor = _DB.cursor()
+    cursor.execute(sql, (value,))
+    return bool(cursor.fetchone()['found'])
 
 
 # -------------- MENU FUNCTIONS: EXPENSES --------------
@@ -251,11 +716,10 @@ def delete_expense_category():
         print("No valid categories available.")
         return
 
-    while True:
-        # Check user input is an integer in valid range.
-        category_id = validate_int_input("Enter category ID to delete: ")
-        if validate_range(category_id, valid_category_ids) is not None:
-            break
+    category_id = prompt_id_in(valid_category_ids, 
+                               "Enter category ID to delete: ")
+    if category_id is None:
+        return
     delete_record('expense_category', category_id)
 
 
@@ -270,41 +734,27 @@ def add_expense():
         print("No valid categories available. Please add a category first.")
         return
     
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        category_id = validate_int_input("Enter category ID to add expense: ")
-        if validate_range(category_id, valid_category_ids) is not None:
-            break
-        else:
-            attempts += 1
+    category_id = prompt_id_in(valid_category_ids, 
+                               "Enter category ID to add expense: ")
+    if category_id is None:
+        return
     amount = validate_float_input("Enter expense amount: £")
     add_record('expenses', (category_id, amount))
 
 
-def view_expenses():
+def print_expenses():
     """
     Displays all expenses records in 'expenses' table.
     """
-    expenses = fetch_expenses()
+    expenses, total_expenses = fetch_expenses()
     if expenses:
         print("CURRENT EXPENSES:\n")
-        print(tabulate(expenses, headers=["ID", "Category", "Amount"], 
-                       floatfmt=".2f"))
-        total_expenses = sum(expense[2] for expense in expenses)
+        print(format_records(expenses))
         print(f"\nTotal Expenses: {total_expenses:.2f}")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return [expense[0] for expense in expenses]
+        _write(_BORDER)
     else:
         print("\nNo expenses have been entered.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return []
+        _write(_BORDER)
 
 
 def view_expense_categories():
@@ -315,11 +765,11 @@ def view_expense_categories():
     if categories:
         print("EXPENSE CATEGORIES:\n")
         print(tabulate(categories, headers=["ID", "Name"]))
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return [category[0] for category in categories]
+        _write(_BORDER)
+        return get_ids('expense_category')
     else:
         print("\nNo expense categories have been entered.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+        _write(_BORDER)
         return []
 
 
@@ -332,30 +782,14 @@ def view_expenses_by_category():
     if not valid_category_ids:
         return
 
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.  
-        category_id = validate_int_input("Enter category ID to view: ")
-        if validate_range(category_id, valid_category_ids) is not None:
-            break
-        else:
-            attempts += 1
+    category_id = prompt_id_in(valid_category_ids, 
+                               "Enter category ID to view: ")
+    if category_id is None:
+        return
     
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute('''SELECT amount FROM expenses 
-                       WHERE category_id = ?''', (category_id,))
-        expenses = cursor.fetchall()
-        print(tabulate(expenses, headers=["Amount"], floatfmt=".2f"))
-        total_expenses = sum(expense[0] for expense in expenses)
-        print(f"\nTotal Expenses in Category: {total_expenses:.2f}")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+    total_expenses = print_by_category('expenses', category_id)
+    print(f"\nTotal Expenses in Category: {total_expenses:.2f}")
+    _write(_BORDER)
 
 
 def update_expense():
@@ -363,24 +797,15 @@ def update_expense():
     Allows user to update the category or amount of an existing
     expense record.
     """
-    valid_expense_ids = view_expenses()
+    print_expenses()
+    valid_expense_ids = get_ids('expenses')
     if not valid_expense_ids:
         return
    
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.  
-        expense_id = validate_int_input("Enter expense ID to update: ")
-        if validate_range(expense_id, valid_expense_ids) is not None:
-            break
-        else: 
-            attempts += 1
+    expense_id = prompt_id_in(valid_expense_ids, 
+                              "Enter expense ID to update: ")
+    if expense_id is None:
+        return
 
     update_record('expenses', expense_id, ['category_id', 'amount'])
 
@@ -389,24 +814,15 @@ def delete_expense():
     """
     Removes an individual existing expense record from the database.
     """
-    valid_expense_ids = view_expenses()
+    print_expenses()
+    valid_expense_ids = get_ids('expenses')
     if not valid_expense_ids:
         return
 
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        expense_id = validate_int_input("Enter expense ID to delete: ")
-        if validate_range(expense_id, valid_expense_ids) is not None:
-            break
-        else:
-            attempts += 1
+    expense_id = prompt_id_in(valid_expense_ids, 
+                              "Enter expense ID to delete: ")
+    if expense_id is None:
+        return
 
     delete_record('expenses', expense_id)
 
@@ -432,20 +848,10 @@ def delete_income_category():
     if not valid_category_ids:
         return
 
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        category_id = validate_int_input("Enter category ID to delete: ")
-        if validate_range(category_id, valid_category_ids) is not None:
-            break
-        else:
-            attempts += 1
+    category_id = prompt_id_in(valid_category_ids, 
+                               "Enter category ID to delete: ")
+    if category_id is None:
+        return
 
     delete_record('income_category', category_id)
 
@@ -459,43 +865,29 @@ def add_income():
     if not valid_category_ids:
         return
         
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        category_id = validate_int_input("Enter category ID to add income: ")
-        if validate_range(category_id, valid_category_ids) is not None:
-            break
-        else:
-            attempts += 1
+    category_id = prompt_id_in(valid_category_ids, 
+                               "Enter category ID to add income: ")
+    if category_id is None:
+        return
 
     amount = validate_float_input("Enter income amount: £")
 
     add_record('income', (category_id, amount))
 
 
-def view_income():
+def print_income():
     """
     Displays all income records in 'income' table.
     """
-    incomes = fetch_income()
+    incomes, total_income = fetch_income()
     if incomes:
         print("\nCURRENT INCOME:\n")
-        print(tabulate(incomes, headers=["ID", "Category", "Amount"], 
-                       floatfmt=".2f"))
-        total_income = sum(income[2] for income in incomes)
+        print(format_records(incomes))
         print(f"\nTotal Income: {total_income:.2f}")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return [income[0] for income in incomes]
+        _write(_BORDER)
     else: 
         print("\nNo income records have been entered.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return []
+        _write(_BORDER)
 
 
 def view_income_categories():
@@ -506,11 +898,11 @@ def view_income_categories():
     if categories:
         print("\nINCOME CATEGORIES:\n")
         print(tabulate(categories, headers=["ID", "Name"]))
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return [category[0] for category in categories]
+        _write(_BORDER)
+        return get_ids('income_category')
     else:
         print("\nNo income categories have been entered.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+        _write(_BORDER)
 
 
 def view_income_by_category():
@@ -522,30 +914,14 @@ def view_income_by_category():
     if not valid_category_ids:
         return
     
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        category_id = validate_int_input("Enter category ID to view income: ")
-        if validate_range(category_id, valid_category_ids) is not None:
-            break
-        else:
-            attempts += 1
+    category_id = prompt_id_in(valid_category_ids, 
+                               "Enter category ID to view income: ")
+    if category_id is None:
+        return
     
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute('''SELECT amount FROM income 
-                       WHERE category_id = ?''', (category_id,))
-        incomes = cursor.fetchall()
-        print(tabulate(incomes, headers=["Amount"], floatfmt=".2f"))
-        total_income = sum(income[0] for income in incomes)
-        print(f"\nTotal Income in Category: {total_income:.2f}")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+    total_income = print_by_category('income', category_id)
+    print(f"\nTotal Income in Category: {total_income:.2f}")
+    _write(_BORDER)
 
 
 def update_income():
@@ -553,24 +929,14 @@ def update_income():
     Allows user to update the category or amount of an existing 
     income record.
     """
-    valid_income_ids = view_income()
+    print_income()
+    valid_income_ids = get_ids('income')
     if not valid_income_ids:
         return
         
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-         
-        # Check user input is an integer in valid range.
-        income_id = validate_int_input("Enter income ID to update: ")
-        if validate_range(income_id, valid_income_ids) is not None:
-            break
-        else: 
-            attempts += 1
+    income_id = prompt_id_in(valid_income_ids, "Enter income ID to update: ")
+    if income_id is None:
+        return
 
     update_record('income', income_id, ['category_id', 'amount'])
 
@@ -579,24 +945,14 @@ def delete_income():
     """
     Removes an individual existing income record from the database.
     """
-    valid_income_ids = view_income()
+    print_income()
+    valid_income_ids = get_ids('income')
     if not valid_income_ids:
         return
 
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        income_id = validate_int_input("Enter income ID to delete: ")
-        if validate_range(income_id, valid_income_ids) is not None:
-            break
-        else: 
-            attempts += 1
+    income_id = prompt_id_in(valid_income_ids, "Enter income ID to delete: ")
+    if income_id is None:
+        return
 
     delete_record('income', income_id)
 
@@ -608,16 +964,15 @@ def display_current_budget():
     """
     Calculates and prints budget based on total income and expenses.
     """
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute("SELECT SUM(amount) FROM income")
-        total_income = cursor.fetchone()[0] or 0
-        cursor.execute("SELECT SUM(amount) FROM expenses")
-        total_expenses = cursor.fetchone()[0] or 0
-        current_budget = total_income - total_expenses
-        print(f"\nTotal Income: {total_income:.2f}")
-        print(f"Total Expenses: {total_expenses:.2f}")
-        print(f"Current Overall Budget: {current_budget:.2f}")
+    cursor = _DB.cursor()
+    # Both totals are calculated in a single statement.
+    cursor.execute('''SELECT (SELECT TOTAL(amount) FROM income), 
+                   (SELECT TOTAL(amount) FROM expenses)''')
+    total_income, total_expenses = cursor.fetchone()
+    current_budget = total_income - total_expenses
+    print(f"\nTotal Income: {total_income:.2f}")
+    print(f"Total Expenses: {total_expenses:.2f}")
+    print(f"Current Overall Budget: {current_budget:.2f}")
 
 
 def set_category_budget():
@@ -628,120 +983,97 @@ def set_category_budget():
     if not valid_category_ids:
         return
     
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        category_id = validate_int_input("Enter category ID to set budget: ")
-        if validate_range(category_id, valid_category_ids) is not None:
-            break
-        else:
-            attempts += 1
+    category_id = prompt_id_in(valid_category_ids, 
+                               "Enter category ID to set budget: ")
+    if category_id is None:
+        return
 
     amount = validate_float_input("Enter budget amount: £")
     
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute('''SELECT 1 FROM budgets 
-                       WHERE category_id = ?''', (category_id,))
-        if cursor.fetchone():
-            print(f"Budget for category ID {category_id} already exists.")
-        else:
-            add_record('budgets', (category_id, amount))
+    # Inserts the budget unless the category already has one.
+    begin_write()
+    cursor = _DB.cursor()
+    try:
+        cursor.execute(get_statement('ins_new', 'budgets'), 
+                       (category_id, amount))
+    except sqlite3.IntegrityError:
+        # The category was deleted since it was listed.
+        print(f"\nBudget not added - invalid category ID: {category_id}.")
+        _write(_BORDER)
+        return
+    if cursor.rowcount == 0:
+        print(f"Budget for category ID {category_id} already exists.")
+    else:
+        add_cached_id('budgets', cursor.lastrowid)
+        invalidate_cache('budgets')
+        print("\nRecord added to budgets.")
+        _write(_BORDER)
 
 
-def view_all_budgets():
+def print_budgets():
     """
-    Displays all income records in 'budgets' table.
+    Displays all category budgets with the amount spent in each category.
     """
-    budgets = fetch_all('budgets')
+    budgets = fetch_budget_status()
     if budgets:
         print("\nCURRENT BUDGETS:\n")
-        print(tabulate(budgets, headers=["ID", "Category", "Amount"], 
+        print(tabulate(budgets, headers=["ID", "Category", "Amount", "Spent"], 
                        floatfmt=".2f"))
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return [budget[0] for budget in budgets]
+        _write(_BORDER)
     else: 
         print("\nNo category budgets have been created.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        return []
+        _write(_BORDER)
     
 
 def view_category_budget():
     """
     Displays budget for a selected category if it has been set.
     """
-    valid_budget_ids = view_all_budgets()
+    print_budgets()
+    valid_budget_ids = get_ids('budgets')
     if not valid_budget_ids:
         return
        
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        budget_id = validate_int_input("Enter budget ID to view details: ")
-        if validate_range(budget_id, valid_budget_ids) is not None:
-            break
-        else:
-            attempts += 1
-
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute('''
-        SELECT budgets.amount, IFNULL(SUM(expenses.amount), 0) FROM budgets 
-        LEFT JOIN expenses ON budgets.category_id = expenses.category_id
-        WHERE budgets.id = ?''', (budget_id,))
-    
-        cat_budget = cursor.fetchone()
-        if cat_budget:
-            budget_amount, total_spent = cat_budget
-            print(f"\nDetails for Budget ID {budget_id}:")
-            print(f"Budget Amount: £{budget_amount:.2f}")
-            print(f"Total Spent: £{total_spent:.2f}")
-    
-            # Compare total category expenses to category budget.
-            if total_spent > budget_amount:
-                excess = total_spent - budget_amount
-                print(f"Expenditure is £{excess:.2f} over budget.")
-            else:
-                print("Expenditure is within the budget.")
-            print("-"*10, "\n") # Border to separate outputs.
+    budget_id = prompt_id_in(valid_budget_ids, 
+                             "Enter budget ID to view details: ")
+    if budget_id is None:
+        return
+
+    # Reuses the cached result set already displayed by print_budgets.
+    budgets = {budget['id']: budget for budget in fetch_budget_status()}
+    cat_budget = budgets.get(budget_id)
+    if cat_budget:
+        category = cat_budget['category']
+        budget_amount = cat_budget['amount']
+        total_spent = cat_budget['spent']
+        print(f"\nDetails for Budget ID {budget_id} ({category}):")
+        print(f"Budget Amount: £{budget_amount:.2f}")
+        print(f"Total Spent: £{total_spent:.2f}")
+
+        # Compare total category expenses to category budget.
+        if total_spent > budget_amount:
+            excess = total_spent - budget_amount
+            print(f"Expenditure is £{excess:.2f} over budget.")
         else:
-            print("No budget found with the given ID.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
+            print("Expenditure is within the budget.")
+        _write(_BORDER)
+    else:
+        print("No budget found with the given ID.")
+        _write(_BORDER)
 
 
 def update_category_budget():
     """
     Allows user to update an existing budget record.
     """
-    valid_budget_ids = view_all_budgets()
+    print_budgets()
+    valid_budget_ids = get_ids('budgets')
     if not valid_budget_ids:
         return
     
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        budget_id = validate_int_input("Enter budget ID to update: ")
-        if validate_range(budget_id, valid_budget_ids) is not None:
-            break
-        else: 
-            attempts += 1
+    budget_id = prompt_id_in(valid_budget_ids, "Enter budget ID to update: ")
+    if budget_id is None:
+        return
 
     update_record('budgets', budget_id, ['amount'])
 
@@ -750,22 +1082,12 @@ def delete_category_budget():
     """
     Removes an individual existing category budget from the database.
     """
-    valid_budget_ids = view_all_budgets()
-    
-    attempts = 0 # Counter for invalid attempts
+    print_budgets()
+    valid_budget_ids = get_ids('budgets')
     
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        budget_id = validate_int_input("Enter budget ID to delete: ")
-        if validate_range(budget_id, valid_budget_ids) is not None:
-            break
-        else:
-            attempts += 1
+    budget_id = prompt_id_in(valid_budget_ids, "Enter budget ID to delete: ")
+    if budget_id is None:
+        return
 
     delete_record('budgets', budget_id)
 
@@ -787,7 +1109,7 @@ def set_financial_goal():
                    (description, target, progress))
     else:
         print("The goal you are trying to set already exists.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+        _write(_BORDER)
     
 
 def view_current_goals():
@@ -799,10 +1121,10 @@ def view_current_goals():
     if goals:
         print("\nCURRENT FINANCIAL GOALS:\n")
         print(tabulate(goals, headers=["ID", "Description"]), "\n")
-        return [goal[0] for goal in goals]
+        return get_ids('financial_goals')
     else: 
         print("\nNo goals have been created.")
-    print("\n", "-"*10, "\n") # Border to separate outputs.
+    _write(_BORDER)
 
 
 def view_goal_progress():
@@ -814,36 +1136,26 @@ def view_goal_progress():
     if not valid_goal_ids:
         return
     
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        goal_id = validate_int_input("Enter goal ID to view progress: ")
-        if validate_range(goal_id, valid_goal_ids) is not None:
-            break
-        else:
-            attempts += 1
+    goal_id = prompt_id_in(valid_goal_ids, "Enter goal ID to view progress: ")
+    if goal_id is None:
+        return
     
-    with sqlite3.connect('finance_manager.db') as db:
-        cursor = db.cursor()
-        cursor.execute('''SELECT description, target, progress 
-                       FROM financial_goals WHERE id = ?''', (goal_id,))
-        goal = cursor.fetchone()
-        description, target, progress = goal
-        print(f"\nGoal: {description}")
-        print(f"Target Amount: £{target:.2f}")
-        print(f"Current Progress: £{progress:.2f}")
-
-        if progress >= target:
-            print("\nYou have reached your saving target!")
-        else:
-            print(f"\nYou are £{target - progress:.2f} short of your target.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+    cursor = _DB.cursor()
+    cursor.execute('''SELECT description, target, progress 
+                   FROM financial_goals WHERE id = ?''', (goal_id,))
+    goal = cursor.fetchone()
+    description = goal['description']
+    target = goal['target']
+    progress = goal['progress']
+    print(f"\nGoal: {description}")
+    print(f"Target Amount: £{target:.2f}")
+    print(f"Current Progress: £{progress:.2f}")
+
+    if progress >= target:
+        print("\nYou have reached your saving target!")
+    else:
+        print(f"\nYou are £{target - progress:.2f} short of your target.")
+    _write(_BORDER)
 
 
 def update_goal():
@@ -855,20 +1167,9 @@ def update_goal():
     if not valid_goal_ids:
         return
     
-    attempts = 0 # Counter for invalid attempts
-    
-    while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
-            return
-        
-        # Check user input is an integer in valid range.
-        goal_id = validate_int_input("Enter goal ID to update: ")
-        if validate_range(goal_id, valid_goal_ids) is not None:
-            break
-        else:
-            attempts += 1
+    goal_id = prompt_id_in(valid_goal_ids, "Enter goal ID to update: ")
+    if goal_id is None:
+        return
 
     update_record('financial_goals', goal_id, 
                  ['description', 'target', 'progress'])
@@ -882,220 +1183,136 @@ def delete_goal():
     if not valid_goal_ids:
         return
 
-    attempts = 0 # Counter for invalid attempts
-    
+    goal_id = prompt_id_in(valid_goal_ids, "Enter goal ID to delete: ")
+    if goal_id is None:
+        return
+
+    delete_record('financial_goals', goal_id)
+
+
+# -------------- MENUS --------------
+
+
+def _read_choice(prompt):
+    """
+    Reads a menu selection, returning it as an integer, or None if the 
+    input is not an integer.
+    """
+    try:
+        return int(input(prompt))
+    except ValueError:
+        return None
+
+
+def invalid_selection():
+    """
+    Tells the user that their menu selection is not one of the options.
+    """
+    _write(_INVALID_SELECTION)
+
+
+def run_menu(prompt, actions):
+    """
+    Repeatedly presents a menu and calls the function mapped to the 
+    user's selection in actions, until 0 is entered. The writes made 
+    by each action are committed as soon as it returns.
+    """
     while True:
-        if attempts >= 3:
-            print("Too many invalid attempts. Please try again later.")
-            print("\n", "-"*10, "\n") # Border to separate outputs.
+        user_choice = _read_choice(prompt)
+        if user_choice is None:
+            _write(_INVALID_INT)
+            continue
+        
+        if user_choice == 0:
             return
+        action = actions.get(user_choice)
+        if action is None:
+            invalid_selection()
+            continue
         
-        # Check user input is an integer in valid range.
-        goal_id = validate_int_input("Enter goal ID to delete: ")
-        if validate_range(goal_id, valid_goal_ids) is not None:
-            break
-        else:
-            attempts += 1
-
-    delete_record('financial_goals', goal_id)
+        try:
+            refresh_caches()
+            action()
+            # The action's writes share one transaction, committed as 
+            # soon as it returns so the write lock is never held while 
+            # waiting for user input.
+            flush()
+        except sqlite3.OperationalError as error:
+            rollback()
+            # Only a database locked by another connection is reported; 
+            # any other error is raised.
+            if 'locked' not in str(error):
+                raise
+            _write(_DB_BUSY)
+
+
+# Menu selections mapped to the functions that handle them.
+EXPENSE_ACTIONS = {
+    1: add_expense_category,
+    2: delete_expense_category,
+    3: add_expense,
+    4: print_expenses,
+    5: view_expense_categories,
+    6: view_expenses_by_category,
+    7: update_expense,
+    8: delete_expense,
+}
+
+INCOME_ACTIONS = {
+    1: add_income_category,
+    2: delete_income_category,
+    3: add_income,
+    4: print_income,
+    5: view_income_categories,
+    6: view_income_by_category,
+    7: update_income,
+    8: delete_income,
+}
+
+BUDGET_ACTIONS = {
+    1: display_current_budget,
+    2: set_category_budget,
+    3: print_budgets,
+    4: view_category_budget,
+    5: update_category_budget,
+    6: delete_category_budget,
+}
+
+GOAL_ACTIONS = {
+    1: set_financial_goal,
+    2: view_current_goals,
+    3: view_goal_progress,
+    4: update_goal,
+    5: delete_goal,
+}
+
+MAIN_MENU = {
+    1: lambda: run_menu(_EXPENSE_PROMPT, EXPENSE_ACTIONS),
+    2: lambda: run_menu(_INCOME_PROMPT, INCOME_ACTIONS),
+    3: lambda: run_menu(_BUDGET_PROMPT, BUDGET_ACTIONS),
+    4: lambda: run_menu(_GOAL_PROMPT, GOAL_ACTIONS),
+}
 
 
 # -------------- USER INTERFACE --------------
 
-# Create budget database if it does not already exist.
-create_database()
 
-# Present main menu to user, ensuring numeric input.
-while True:
-    user_choice = input(
-'''\nWould you like to:
-    1. Manage expenses
-    2. Manage income
-    3. Manage budgets
-    4. Manage financial goals
-    0. Exit
-                            
-Enter selection: ''')
-        
-    if user_choice.isnumeric():
-        user_choice = int(user_choice)
-    else:
-        print("\nInvalid input - please enter selection as an integer.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
-        continue
-
-    # Sub-menu of options managing expenses.
-    if user_choice == 1:
-        while True:
-            user_choice = input(
-'''\nWould you like to:
-    1. Add an expense category
-    2. Delete expense category
-    3. Add new expense
-    4. View all expenses
-    5. View all expense categories
-    6. View expenses by category
-    7. Update expense
-    8. Delete expense
-    0. Return to main menu
-    
-Enter selection: ''')
-            
-            if user_choice.isnumeric():
-                user_choice = int(user_choice)
-            else:
-                print("\nInvalid input. Please enter selection as an integer.")
-                print("\n", "-"*10, "\n") # Border to separate outputs.
-                continue
-            
-            if user_choice == 1:
-                add_expense_category()
-            elif user_choice == 2:
-                delete_expense_category()
-            elif user_choice == 3:
-                add_expense()
-            elif user_choice == 4:
-                view_expenses()
-            elif user_choice == 5:
-                view_expense_categories()
-            elif user_choice == 6:
-                view_expenses_by_category()
-            elif user_choice == 7:
-                update_expense()
-            elif user_choice == 8:
-                delete_expense()
-            elif user_choice == 0:
-                break
-            else:
-                print("\nInvalid selection - please try again.")
-                print("\n", "-"*10, "\n") # Border to separate outputs.
-
-    # Sub-menu of options for managing income
-    elif user_choice == 2: 
-        while True:
-            user_choice = input(
-'''\nWould you like to:
-    1. Add an income category
-    2. Delete an income category
-    3. Add new income
-    4. View all income
-    5. View income categories
-    6. View income by category
-    7. Update income
-    8. Delete income
-    0. Return to main menu
-    
-Enter selection: ''')
-            
-            if user_choice.isnumeric():
-                user_choice = int(user_choice)
-            else:
-                print("\nInvalid input. Please enter selection as an integer.")
-                print("\n", "-"*10, "\n") # Border to separate outputs.
-                continue
-            
-            if user_choice == 1:
-                add_income_category()
-            elif user_choice == 2:
-                delete_income_category()
-            elif user_choice == 3:
-                add_income()
-            elif user_choice == 4:
-                view_income()
-            elif user_choice ==5:
-                view_income_categories()
-            elif user_choice == 6:
-                view_income_by_category()
-            elif user_choice == 7:
-                update_income()
-            elif user_choice == 8:
-                delete_income()
-            elif user_choice == 0:
-                break    
-            else:
-                print("\nInvalid selection - please try again.")
-                print("\n", "-"*10, "\n") # Border to separate outputs.
-    
-    # Sub-menu of options for managing budgets.
-    elif user_choice == 3: 
-        while True:
-            user_choice = input(
-'''\nWould you like to:
-    1. Display current budget
-    2. Set a category budget
-    3. View current category budgets
-    4. View a category budget
-    5. Update a category budget
-    6. Delete a category budget
-    0. Return to main menu
-    
-Enter selection: ''')
-            
-            if user_choice.isnumeric():
-                user_choice = int(user_choice)
-            else:
-                print("\nInvalid input. Please enter selection as an integer.")
-                print("\n", "-"*10, "\n") # Border to separate outputs.
-                continue
-            
-            if user_choice == 1:
-                display_current_budget()
-            elif user_choice == 2:
-                set_category_budget()
-            elif user_choice == 3:
-                view_all_budgets()
-            elif user_choice == 4:
-                view_category_budget()
-            elif user_choice == 5:
-                 update_category_budget()
-            elif user_choice == 6:
-                delete_category_budget()
-            elif user_choice == 0:
-                break   
-            else:
-                print("\nInvalid selection - please try again.")
-                print("\n", "-"*10, "\n") # Border to separate outputs. 
-    
-    # Sub-menu of options for managing financial goals.
-    elif user_choice == 4: 
-        while True:
-            user_choice = input(
-'''\nWould you like to:
-    1. Set a financial goal
-    2. View current goals
-    3. View progress towards financial goals
-    4. Update a financial goal
-    5. Delete goal
-    0. Return to main menu
-    
-Enter selection: ''')
-
-            if user_choice.isnumeric():
-                user_choice = int(user_choice)
-            else:
-                print("\nInvalid input. Please enter selection as an integer.")
-                print("\n", "-"*10, "\n") # Border to separate outputs.
-                continue
-            
-            if user_choice == 1:
-                set_financial_goal()
-            elif user_choice ==2:
-                view_current_goals()
-            elif user_choice == 3:
-                view_goal_progress()
-            elif user_choice == 4:    
-                update_goal()
-            elif user_choice == 5:
-                delete_goal()
-            elif user_choice == 0:
-                break
-            else:
-                print("\nInvalid selection - please try again.")
-                print("\n", "-"*10, "\n") # Border to separate outputs.
-
-    elif user_choice == 0:
-        print("\nExiting program - goodbye.\n", "-"*10)
-        break
-    else:
-        print("\nInvalid selection - please try again.")
-        print("\n", "-"*10, "\n") # Border to separate outputs.
+def main():
+    """
+    Sets up the database and runs the main menu until the user exits.
+    """
+    # Configure the shared connection and create the database tables if 
+    # they do not already exist, once before the menu is shown.
+    create_database()
+
+    # Commit any outstanding writes when the program exits. Registered 
+    # after the connection, so it runs before the connection is closed.
+    atexit.register(flush)
+
+    # Present main menu to user until they choose to exit.
+    run_menu(_MAIN_PROMPT, MAIN_MENU)
+    print("\nExiting program - goodbye.\n", DASHES)
+
+
+if __name__ == "__main__":
+    main()